@@ -1,142 +1,238 @@
 """
 Balance and position tracking for trading ledger
 """
-import yaml
+import atexit
+import json
+import os
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
 
-BALANCE_FILE = "balance.yaml"
+# Serialize the ledger with orjson when it is installed (same optional
+# dependency polymarket_client uses for parsing); stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BALANCE_FILE = "balance.json"
+LEGACY_BALANCE_FILE = "balance.yaml"
 TRADE_HISTORY_FILE = "trade_history.txt"
 
-def load_balance():
-    """Load balance and positions from YAML file"""
-    if not Path(BALANCE_FILE).exists():
-        return {"balance": 30.0, "positions": {}}
-    
-    with open(BALANCE_FILE, 'r') as f:
+# Separator used between trade history records, built once
+_SEP = "=" * 70 + "\n"
+
+# In-memory cache so the main loop doesn't re-parse the ledger file on every
+# get_balance/get_position call. Invalidated by file mtime.
+_CACHE = {"mtime": None, "data": None}
+
+# Set by save_balance, cleared by flush_balance. While dirty, the cache is
+# newer than the file on disk.
+_dirty = False
+
+# Guards all ledger access; the ping server thread and the main loop can both
+# touch the ledger. Reentrant so record_* can call load_balance/save_balance.
+_LOCK = threading.RLock()
+
+def _migrate_legacy_balance():
+    """One-shot migration: rewrite balance.yaml as balance.json if present"""
+    if Path(BALANCE_FILE).exists() or not Path(LEGACY_BALANCE_FILE).exists():
+        return
+    import yaml
+    with open(LEGACY_BALANCE_FILE, 'r') as f:
         data = yaml.safe_load(f)
-        if data is None:
+    if data is None:
+        data = {"balance": 30.0, "positions": {}}
+    with open(BALANCE_FILE, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def load_balance():
+    """Load balance and positions from JSON file (cached by file mtime).
+
+    Returns the shared cached dict - no copy is made. record_buy/record_sell
+    mutate this same object in place, so callers holding a reference see
+    updates immediately and there is never a re-parse between them.
+    """
+    with _LOCK:
+        if _dirty:
+            # Unflushed mutations - the cache is ahead of the file on disk
+            return _CACHE["data"]
+
+        _migrate_legacy_balance()
+        if not Path(BALANCE_FILE).exists():
             return {"balance": 30.0, "positions": {}}
-        return data
+
+        mtime = os.stat(BALANCE_FILE).st_mtime_ns
+        if _CACHE["data"] is not None and _CACHE["mtime"] == mtime:
+            return _CACHE["data"]
+
+        with open(BALANCE_FILE, 'r') as f:
+            data = json.load(f)
+            if data is None:
+                data = {"balance": 30.0, "positions": {}}
+            _CACHE["data"] = data
+            _CACHE["mtime"] = mtime
+            return data
 
 def save_balance(data):
-    """Save balance and positions to YAML file"""
-    with open(BALANCE_FILE, 'w') as f:
-        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+    """Update the in-memory ledger and mark it dirty (written by flush_balance)"""
+    global _dirty
+    with _LOCK:
+        _CACHE["data"] = data
+        _dirty = True
+
+def flush_balance():
+    """Write the ledger to disk if it has unflushed mutations (atomic rename)"""
+    global _dirty
+    with _LOCK:
+        if not _dirty:
+            return
+        tmp = BALANCE_FILE + ".tmp"
+        if orjson is not None:
+            with open(tmp, 'wb') as f:
+                f.write(orjson.dumps(_CACHE["data"], option=orjson.OPT_INDENT_2))
+        else:
+            with open(tmp, 'w') as f:
+                json.dump(_CACHE["data"], f, indent=2)
+        os.replace(tmp, BALANCE_FILE)
+        _CACHE["mtime"] = os.stat(BALANCE_FILE).st_mtime_ns
+        _dirty = False
+
+# Make sure pending mutations hit disk on shutdown
+atexit.register(flush_balance)
+
+# Long-lived buffered handle for trade_history.txt, opened on first trade
+_HIST_FH = None
+
+def _history_file():
+    """Return the shared append-mode handle for the trade history file"""
+    global _HIST_FH
+    if _HIST_FH is None:
+        _HIST_FH = open(TRADE_HISTORY_FILE, 'a', encoding='utf-8', buffering=1 << 16)
+        atexit.register(_HIST_FH.close)
+    return _HIST_FH
 
 def append_trade_history(trade_type, slug, shares, amount, price_per_share, balance_after, profit_loss=None):
     """Append trade to human-readable history file"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    with open(TRADE_HISTORY_FILE, 'a', encoding='utf-8') as f:
-        f.write("=" * 70 + "\n")
-        f.write(f"{trade_type.upper()} - {timestamp}\n")
-        f.write("=" * 70 + "\n")
-        f.write(f"Token:          {slug}\n")
-        f.write(f"Shares:         {shares:.2f}\n")
-        f.write(f"Price/Share:    ${price_per_share:.3f}\n")
-        
-        if trade_type.lower() == "buy":
-            f.write(f"Total Cost:     ${amount:.2f}\n")
-        else:  # sell
-            f.write(f"Total Proceeds: ${amount:.2f}\n")
-            if profit_loss is not None:
-                profit_emoji = "🟢" if profit_loss > 0 else "🔴" if profit_loss < 0 else "⚪"
-                f.write(f"Profit/Loss:    {profit_emoji} ${profit_loss:+.2f}\n")
-        
-        f.write(f"Balance After:  ${balance_after:.2f}\n")
-        f.write("=" * 70 + "\n\n")
+    # time.strftime formats local time directly, no datetime object needed
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    lines = [
+        _SEP,
+        f"{trade_type.upper()} - {timestamp}\n",
+        _SEP,
+        f"Token:          {slug}\n",
+        f"Shares:         {shares:.2f}\n",
+        f"Price/Share:    ${price_per_share:.3f}\n",
+    ]
+
+    if trade_type.lower() == "buy":
+        lines.append(f"Total Cost:     ${amount:.2f}\n")
+    else:  # sell
+        lines.append(f"Total Proceeds: ${amount:.2f}\n")
+        if profit_loss is not None:
+            profit_emoji = "🟢" if profit_loss > 0 else "🔴" if profit_loss < 0 else "⚪"
+            lines.append(f"Profit/Loss:    {profit_emoji} ${profit_loss:+.2f}\n")
+
+    lines.append(f"Balance After:  ${balance_after:.2f}\n")
+    lines.append(_SEP + "\n")
+
+    _history_file().write("".join(lines))
 
 def record_buy(slug, shares, total_cost):
     """Record a buy transaction"""
-    data = load_balance()
+    with _LOCK:
+        data = load_balance()
     
-    # Deduct from balance
-    if data['balance'] < total_cost:
-        print(f"WARNING: Insufficient balance (${data['balance']:.2f}) for purchase (${total_cost:.2f})")
-        return False
+        # Deduct from balance
+        if data['balance'] < total_cost:
+            print(f"WARNING: Insufficient balance (${data['balance']:.2f}) for purchase (${total_cost:.2f})")
+            return False
     
-    data['balance'] -= total_cost
+        data['balance'] -= total_cost
     
-    # Update position - ensure positions is a dict, not None
-    if 'positions' not in data or data['positions'] is None:
-        data['positions'] = {}
+        # Update position - ensure positions is a dict, not None
+        if 'positions' not in data or data['positions'] is None:
+            data['positions'] = {}
     
-    if slug not in data['positions']:
-        data['positions'][slug] = {
-            'shares': 0.0,
-            'avg_cost': 0.0,
-            'total_invested': 0.0
-        }
+        if slug not in data['positions']:
+            data['positions'][slug] = {
+                'shares': 0.0,
+                'avg_cost': 0.0,
+                'total_invested': 0.0
+            }
     
-    position = data['positions'][slug]
+        position = data['positions'][slug]
     
-    # Calculate new average cost
-    old_shares = position['shares']
-    old_invested = position['total_invested']
-    new_shares = old_shares + shares
-    new_invested = old_invested + total_cost
+        # Calculate new average cost
+        old_shares = position['shares']
+        old_invested = position['total_invested']
+        new_shares = old_shares + shares
+        new_invested = old_invested + total_cost
     
-    position['shares'] = new_shares
-    position['total_invested'] = new_invested
-    position['avg_cost'] = new_invested / new_shares if new_shares > 0 else 0.0
+        position['shares'] = new_shares
+        position['total_invested'] = new_invested
+        position['avg_cost'] = new_invested / new_shares if new_shares > 0 else 0.0
     
-    save_balance(data)
+        save_balance(data)
     
-    # Append to trade history
-    price_per_share = total_cost / shares if shares > 0 else 0.0
-    append_trade_history("BUY", slug, shares, total_cost, price_per_share, data['balance'])
+        # Append to trade history
+        price_per_share = total_cost / shares if shares > 0 else 0.0
+        append_trade_history("BUY", slug, shares, total_cost, price_per_share, data['balance'])
     
-    return True
+        return True
 
 def record_sell(slug, shares, total_proceeds):
     """Record a sell transaction"""
-    data = load_balance()
+    with _LOCK:
+        data = load_balance()
     
-    if 'positions' not in data or data['positions'] is None:
-        data['positions'] = {}
+        if 'positions' not in data or data['positions'] is None:
+            data['positions'] = {}
     
-    if slug not in data['positions']:
-        print(f"WARNING: No position found for {slug}")
-        return False
+        if slug not in data['positions']:
+            print(f"WARNING: No position found for {slug}")
+            return False
     
-    position = data['positions'][slug]
+        position = data['positions'][slug]
     
-    if position['shares'] < shares:
-        print(f"WARNING: Insufficient shares ({position['shares']:.2f}) to sell {shares:.2f}")
-        return False
+        if position['shares'] < shares:
+            print(f"WARNING: Insufficient shares ({position['shares']:.2f}) to sell {shares:.2f}")
+            return False
     
-    # Calculate profit/loss before updating
-    old_shares = position['shares']
-    old_invested = position['total_invested']
-    invested_in_sold = (shares / old_shares) * old_invested if old_shares > 0 else 0
-    profit_loss = total_proceeds - invested_in_sold
+        # Calculate profit/loss before updating
+        old_shares = position['shares']
+        old_invested = position['total_invested']
+        invested_in_sold = (shares / old_shares) * old_invested if old_shares > 0 else 0
+        profit_loss = total_proceeds - invested_in_sold
     
-    # Add proceeds to balance
-    data['balance'] += total_proceeds
+        # Add proceeds to balance
+        data['balance'] += total_proceeds
     
-    # Update position
-    position['shares'] -= shares
-    position['total_invested'] -= invested_in_sold
-    position['avg_cost'] = position['total_invested'] / position['shares'] if position['shares'] > 0 else 0.0
+        # Update position
+        position['shares'] -= shares
+        position['total_invested'] -= invested_in_sold
+        position['avg_cost'] = position['total_invested'] / position['shares'] if position['shares'] > 0 else 0.0
     
-    save_balance(data)
+        save_balance(data)
     
-    # Append to trade history
-    price_per_share = total_proceeds / shares if shares > 0 else 0.0
-    append_trade_history("SELL", slug, shares, total_proceeds, price_per_share, data['balance'], profit_loss)
+        # Append to trade history
+        price_per_share = total_proceeds / shares if shares > 0 else 0.0
+        append_trade_history("SELL", slug, shares, total_proceeds, price_per_share, data['balance'], profit_loss)
     
-    return True
+        return True
 
 def get_position(slug):
     """Get position info for a slug"""
-    data = load_balance()
-    if 'positions' not in data or data['positions'] is None:
-        return None
-    return data['positions'].get(slug)
+    with _LOCK:
+        data = load_balance()
+        if 'positions' not in data or data['positions'] is None:
+            return None
+        return data['positions'].get(slug)
 
 def get_balance():
     """Get current balance"""
-    data = load_balance()
-    return data.get('balance', 0.0)
+    with _LOCK:
+        data = load_balance()
+        return data.get('balance', 0.0)
 
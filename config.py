@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 from typing import Dict, Any, List
@@ -11,12 +12,27 @@ DEFAULT_CONFIG = {
 	"min_value": 20.0
 }
 
+# Normalized default tokens, built once so fallback paths don't rebuild them
+DEFAULT_TOKENS = tuple({"id": tid} for tid in DEFAULT_CONFIG["token_ids"])
+
 
 def _normalize_tokens(conf: Dict[str, Any]) -> List[Dict[str, str]]:
 	"""Return a normalized list of tokens as [{id, slug?}]."""
 	# New format: tokens: [{"id": "...", "slug": "..."}]
 	tokens = conf.get("tokens")
 	if isinstance(tokens, list) and tokens:
+		# Fast path: well-formed configs (string ids, optional slugs) skip the
+		# per-token re-coercion below
+		if all(
+			isinstance(t, dict)
+			and isinstance(t.get("id"), str)
+			and (t.get("slug") is None or isinstance(t.get("slug"), str))
+			for t in tokens
+		):
+			return [
+				{"id": t["id"], "slug": t["slug"]} if t.get("slug") else {"id": t["id"]}
+				for t in tokens
+			]
 		normalized = []
 		for t in tokens:
 			if isinstance(t, dict) and "id" in t:
@@ -30,16 +46,15 @@ def _normalize_tokens(conf: Dict[str, Any]) -> List[Dict[str, str]]:
 	if isinstance(token_ids, list) and token_ids:
 		return [{"id": str(tid)} for tid in token_ids]
 	# Fallback to defaults
-	return [{"id": tid} for tid in DEFAULT_CONFIG["token_ids"]]
+	return list(DEFAULT_TOKENS)
 
 
-def load_config(path: str = "config.json") -> Dict[str, Any]:
-	"""Load configuration from JSON file, falling back to defaults.
-	Returns a dict with 'tokens' (list of {id, slug?}), 'investment', 'min_value'.
-	"""
-	if not os.path.exists(path):
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(path: str, mtime: int) -> Dict[str, Any]:
+	"""Parse the config file once per (path, mtime); mtime busts the cache."""
+	if mtime == 0:
 		return {
-			"tokens": _normalize_tokens(DEFAULT_CONFIG),
+			"tokens": list(DEFAULT_TOKENS),
 			"investment": DEFAULT_CONFIG["investment"],
 			"min_value": DEFAULT_CONFIG["min_value"],
 		}
@@ -53,7 +68,16 @@ def load_config(path: str = "config.json") -> Dict[str, Any]:
 			}
 	except Exception:
 		return {
-			"tokens": _normalize_tokens(DEFAULT_CONFIG),
+			"tokens": list(DEFAULT_TOKENS),
 			"investment": DEFAULT_CONFIG["investment"],
 			"min_value": DEFAULT_CONFIG["min_value"],
 		}
+
+
+def load_config(path: str = "config.json") -> Dict[str, Any]:
+	"""Load configuration from JSON file, falling back to defaults.
+	Returns a dict with 'tokens' (list of {id, slug?}), 'investment', 'min_value'.
+	Results are memoized on (path, mtime) so repeat calls skip the parse.
+	"""
+	mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+	return _load_config_cached(path, mtime)
@@ -3,14 +3,23 @@
 Simple Polymarket orderbook data collection
 """
 
+import heapq
 import time
 import threading
 import sys
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from config import load_config
-from polymarket_client import fetch_orderbook, save_orderbook_snapshot
-from ping_server import start_ping_server, ping_data
-from balance_manager import record_buy, record_sell, get_balance, get_position
+from polymarket_client import fetch_orderbook_cached, save_orderbook_snapshot
+from ping_server import start_ping_server, ping_data, PING_EVENT
+from balance_manager import record_buy, record_sell, get_balance, get_position, flush_balance, load_balance
+
+
+# Preformatted separators and progress bars (avoid rebuilding per tick)
+SEP_EQ = "=" * 70
+SEP_HEAVY = "═" * 70
+SEP_LIGHT = "─" * 70
+CLEAR_LINE = "\r" + " " * 100 + "\r"
+BAR_TABLE = ['█' * i + '░' * (30 - i) for i in range(31)]
 
 
 def format_time(seconds):
@@ -32,56 +41,73 @@ def main():
 	investment = float(config.get('investment', 0))
 	min_value = float(config.get('min_value', 20.0))
 	sell_timeout = int(config.get('sell_timeout', 100))  # seconds
+
+	# Precompute slug -> token id so the timer loop doesn't rescan the list
+	token_by_slug = {t.get('slug'): t['id'] for t in tokens}
 	
-	# Print startup info
-	print("\n" + "="*70)
-	print("🎯 SNIPERX STARTED")
-	print("="*70)
-	print(f"📊 Tracking: {len(tokens)} token(s)")
-	print(f"💰 Investment per trade: ${investment:.2f}")
-	print(f"⏱️  Auto-sell timeout: {format_time(sell_timeout)}")
-	print(f"🌐 Ping server running on: http://0.0.0.0:5000/ping")
-	print("="*70 + "\n")
-	print("⏳ Waiting for ping signal...\n")
+	# Print startup info (banner assembled once, written with one syscall)
+	sys.stdout.write(
+		f"\n{SEP_EQ}\n"
+		"🎯 SNIPERX STARTED\n"
+		f"{SEP_EQ}\n"
+		f"📊 Tracking: {len(tokens)} token(s)\n"
+		f"💰 Investment per trade: ${investment:.2f}\n"
+		f"⏱️  Auto-sell timeout: {format_time(sell_timeout)}\n"
+		f"🌐 Ping server running on: http://0.0.0.0:5000/ping\n"
+		f"{SEP_EQ}\n\n"
+		"⏳ Waiting for ping signal...\n\n"
+	)
 	
 	# Track sell timers for each token
-	sell_timers = {}  # {slug: datetime when timer started}
-	
+	sell_timers = {}  # {slug: time.monotonic() when timer started}
+	last_drawn = {}  # {slug: seconds-remaining of the last countdown redraw}
+
+	# Pool for fetching all tokens' orderbooks in parallel on each ping
+	fetch_pool = ThreadPoolExecutor(max_workers=min(16, len(tokens) or 1))
+
 	try:
 		last_seen_count = 0
 		while True:
 			# Only act when a new ping arrives
 			current_count = ping_data.get('count', 0)
 			if current_count > last_seen_count:
-				# New ping received; fetch and save snapshots once per ping
-				for t in tokens:
+				# New ping received; fetch all orderbooks concurrently
+				# (requests releases the GIL on I/O, so threads overlap the RTTs)
+				fetched = list(fetch_pool.map(lambda t: (t, fetch_orderbook_cached(t['id'])), tokens))
+				for t, orderbook_data in fetched:
 					token_id = t['id']
 					slug = t.get('slug')
-					orderbook_data = fetch_orderbook(token_id)
 					if orderbook_data:
-						# Check if we have an existing position
-						position = get_position(slug)
-						
+						# One ledger read per token - record_* mutate this same
+						# cached dict, so no re-parse happens below
+						ledger = load_balance()
+						positions = ledger.get('positions') or {}
+						position = positions.get(slug)
+
 						if position and position['shares'] > 0:
 							# We have a position - check if timer exists
 							if slug in sell_timers:
 								# Timer already running - reset it
-								sys.stdout.write("\r" + " " * 100 + "\r")  # Clear countdown line
+								sys.stdout.write(CLEAR_LINE)  # Clear countdown line
 								sys.stdout.flush()
-								sell_timers[slug] = datetime.now()
-								print(f"\n{'─'*70}")
-								print(f"🔄 TIMER RESET - {slug.upper()}")
-								print(f"⏱️  Auto-sell in: {format_time(sell_timeout)}")
-								print(f"{'─'*70}\n")
+								sell_timers[slug] = time.monotonic()
+								sys.stdout.write(
+									f"\n{SEP_LIGHT}\n"
+									f"🔄 TIMER RESET - {slug.upper()}\n"
+									f"⏱️  Auto-sell in: {format_time(sell_timeout)}\n"
+									f"{SEP_LIGHT}\n\n"
+								)
 							else:
 								# Position exists but no timer (maybe from restart) - don't start timer
-								print(f"\n{'─'*70}")
-								print(f"📌 POSITION DETECTED - {slug.upper()}")
-								print(f"💡 Waiting for next ping to start timer")
-								print(f"{'─'*70}\n")
+								sys.stdout.write(
+									f"\n{SEP_LIGHT}\n"
+									f"📌 POSITION DETECTED - {slug.upper()}\n"
+									"💡 Waiting for next ping to start timer\n"
+									f"{SEP_LIGHT}\n\n"
+								)
 						else:
 							# No position - try to buy
-							available_balance = get_balance()
+							available_balance = ledger.get('balance', 0.0)
 							investment_amount = min(investment, available_balance)
 							
 							# Save snapshot (quiet) and include trade plan using available balance
@@ -98,127 +124,157 @@ def main():
 									new_balance = get_balance()
 									position = get_position(slug)
 									
-									print(f"\n{'═'*70}")
-									print(f"✅ BUY ORDER EXECUTED - {slug.upper()}")
-									print(f"{'═'*70}")
-									for f in fills:
-										print(f"  📈 Buy {f['shares']:.2f} shares @ ${f['price']:.3f} = ${f['cost']:.2f}")
-									print(f"  ───────────────────────────────────")
-									print(f"  💰 Total Spent:     ${total_spent:.2f}")
-									print(f"  📊 Total Shares:    {total_shares:.2f}")
-									print(f"  💵 Avg Cost:        ${position['avg_cost']:.3f}")
-									print(f"  💼 Balance:         ${new_balance:.2f}")
-									print(f"{'═'*70}")
-									
 									# Start sell timer ONLY after buy
-									sell_timers[slug] = datetime.now()
-									print(f"⏱️  AUTO-SELL TIMER STARTED: {format_time(sell_timeout)}")
-									print(f"{'═'*70}\n")
+									sell_timers[slug] = time.monotonic()
+
+									# Assemble the report and write it with one syscall
+									out = [
+										f"\n{SEP_HEAVY}\n",
+										f"✅ BUY ORDER EXECUTED - {slug.upper()}\n",
+										f"{SEP_HEAVY}\n",
+									]
+									for f in fills:
+										out.append(f"  📈 Buy {f['shares']:.2f} shares @ ${f['price']:.3f} = ${f['cost']:.2f}\n")
+									out.append(
+										"  ───────────────────────────────────\n"
+										f"  💰 Total Spent:     ${total_spent:.2f}\n"
+										f"  📊 Total Shares:    {total_shares:.2f}\n"
+										f"  💵 Avg Cost:        ${position['avg_cost']:.3f}\n"
+										f"  💼 Balance:         ${new_balance:.2f}\n"
+										f"{SEP_HEAVY}\n"
+										f"⏱️  AUTO-SELL TIMER STARTED: {format_time(sell_timeout)}\n"
+										f"{SEP_HEAVY}\n\n"
+									)
+									sys.stdout.write("".join(out))
 								else:
 									print(f"\n⚠️  {slug.upper()}: Insufficient balance\n")
 							else:
 								print(f"\n⚠️  {slug.upper()}: No liquidity available\n")
 				last_seen_count = current_count
 			
-			# Check sell timers and display countdown
-			for t in tokens:
-				slug = t.get('slug')
-				token_id = t['id']
+			# Check sell timers and display countdown (only active timers)
+			for slug, timer_start in list(sell_timers.items()):
+				token_id = token_by_slug[slug]
+				time_elapsed = time.monotonic() - timer_start
+				time_remaining = int(sell_timeout - time_elapsed)
 				
-				if slug in sell_timers:
-					time_elapsed = (datetime.now() - sell_timers[slug]).total_seconds()
-					time_remaining = int(sell_timeout - time_elapsed)
-					
-					# Display countdown (update in place)
-					if time_remaining > 0:
-						time_str = format_time(time_remaining)
-						# Create a nice progress bar
-						progress_percent = (time_elapsed / sell_timeout) * 100
-						bar_length = 30
-						filled_length = int(bar_length * progress_percent / 100)
-						bar = '█' * filled_length + '░' * (bar_length - filled_length)
-						
-						sys.stdout.write(f"\r⏱️  [{bar}] {slug.upper()}: {time_str} remaining   ")
+				# Display countdown (update in place, only when the second changes)
+				if time_remaining > 0 and last_drawn.get(slug) != time_remaining:
+					time_str = format_time(time_remaining)
+					# Pick the precomputed progress bar for this fill level
+					filled_length = min(int(30 * time_elapsed / sell_timeout), 30)
+					bar = BAR_TABLE[filled_length]
+
+					sys.stdout.write(f"\r⏱️  [{bar}] {slug.upper()}: {time_str} remaining   ")
+					sys.stdout.flush()
+					last_drawn[slug] = time_remaining
+				
+				if time_elapsed >= sell_timeout:
+					# Timer expired - sell the position
+					position = get_position(slug)
+					if position and position['shares'] > 0:
+						# record_sell mutates this same cached dict in place, so
+						# take the pre-sale numbers now for the report below
+						shares_sold = position['shares']
+						invested = position['total_invested']
+						# Clear the countdown line before printing results
+						sys.stdout.write(
+							CLEAR_LINE
+							+ f"\n{SEP_HEAVY}\n"
+							f"⏰ TIMER EXPIRED - AUTO-SELLING {slug.upper()}\n"
+							f"{SEP_HEAVY}\n"
+						)
 						sys.stdout.flush()
-					
-					if time_elapsed >= sell_timeout:
-						# Timer expired - sell the position
-						position = get_position(slug)
-						if position and position['shares'] > 0:
-							# Clear the countdown line before printing results
-							sys.stdout.write("\r" + " " * 100 + "\r")
-							sys.stdout.flush()
-							
-							print(f"\n{'═'*70}")
-							print(f"⏰ TIMER EXPIRED - AUTO-SELLING {slug.upper()}")
-							print(f"{'═'*70}")
+						
+						# Fetch current orderbook to get best bid prices
+						orderbook_data = fetch_orderbook_cached(token_id)
+						if orderbook_data:
+							# Save snapshot before selling
+							save_orderbook_snapshot(orderbook_data, token_id, min_value=min_value, slug=slug, investment=0, trade_type="SELL")
 							
-							# Fetch current orderbook to get best bid prices
-							orderbook_data = fetch_orderbook(token_id)
-							if orderbook_data:
-								# Save snapshot before selling
-								save_orderbook_snapshot(orderbook_data, token_id, min_value=min_value, slug=slug, investment=0, trade_type="SELL")
-								
-								bids = orderbook_data.get('bids', [])
+							bids = orderbook_data.get('bids', [])
+
+							# Cast prices/sizes once, then take only the top bid
+							# levels (partial sort - a few levels cover the position).
+							# If the top slice can't absorb the whole position, fall
+							# back to the full book so proceeds aren't understated.
+							bid_levels = [(float(b['price']), float(b['size'])) for b in bids]
+							sorted_bids = heapq.nlargest(min(len(bid_levels), 32), bid_levels)
+							if len(bid_levels) > 32 and sum(size for _, size in sorted_bids) < shares_sold:
+								sorted_bids = sorted(bid_levels, reverse=True)
+
+							# Calculate sell proceeds by filling across bid levels
+							shares_to_sell = shares_sold
+							total_proceeds = 0.0
+							sell_fills = []
+
+							for price, available_size in sorted_bids:
+								if shares_to_sell <= 0:
+									break
+
+								shares_at_price = min(available_size, shares_to_sell)
+								proceeds = shares_at_price * price
 								
-								# Sort bids by price (high to low) to sell at best prices
-								sorted_bids = sorted(bids, key=lambda x: float(x['price']), reverse=True)
+								sell_fills.append({'price': price, 'shares': shares_at_price, 'proceeds': proceeds})
+								total_proceeds += proceeds
+								shares_to_sell -= shares_at_price
+							
+							# Record the sell
+							if record_sell(slug, shares_sold, total_proceeds):
+								new_balance = get_balance()
+								profit = total_proceeds - invested
+								profit_emoji = "🟢" if profit > 0 else "🔴" if profit < 0 else "⚪"
 								
-								# Calculate sell proceeds by filling across bid levels
-								shares_to_sell = position['shares']
-								total_proceeds = 0.0
-								sell_fills = []
+								# Assemble the report and write it with one syscall
+								out = [
+									"💼 SELL ORDER EXECUTED\n",
+									f"{SEP_LIGHT}\n",
+								]
+								for f in sell_fills:
+									out.append(f"  📉 Sell {f['shares']:.2f} shares @ ${f['price']:.3f} = ${f['proceeds']:.2f}\n")
+								out.append(
+									"  ───────────────────────────────────\n"
+									f"  💵 Total Proceeds:  ${total_proceeds:.2f}\n"
+									f"  📊 Shares Sold:     {shares_sold:.2f}\n"
+									f"  {profit_emoji} Profit/Loss:    ${profit:+.2f}\n"
+									f"  💼 New Balance:     ${new_balance:.2f}\n"
+									f"{SEP_HEAVY}\n\n"
+								)
+								sys.stdout.write("".join(out))
 								
-								for bid in sorted_bids:
-									if shares_to_sell <= 0:
-										break
-									
-									price = float(bid['price'])
-									available_size = float(bid['size'])
-									
-									shares_at_price = min(available_size, shares_to_sell)
-									proceeds = shares_at_price * price
-									
-									sell_fills.append({'price': price, 'shares': shares_at_price, 'proceeds': proceeds})
-									total_proceeds += proceeds
-									shares_to_sell -= shares_at_price
-								
-								# Record the sell
-								if record_sell(slug, position['shares'], total_proceeds):
-									new_balance = get_balance()
-									profit = total_proceeds - position['total_invested']
-									profit_emoji = "🟢" if profit > 0 else "🔴" if profit < 0 else "⚪"
-									
-									print(f"💼 SELL ORDER EXECUTED")
-									print(f"{'─'*70}")
-									for f in sell_fills:
-										print(f"  📉 Sell {f['shares']:.2f} shares @ ${f['price']:.3f} = ${f['proceeds']:.2f}")
-									print(f"  ───────────────────────────────────")
-									print(f"  💵 Total Proceeds:  ${total_proceeds:.2f}")
-									print(f"  📊 Shares Sold:     {position['shares']:.2f}")
-									print(f"  {profit_emoji} Profit/Loss:    ${profit:+.2f}")
-									print(f"  💼 New Balance:     ${new_balance:.2f}")
-									print(f"{'═'*70}\n")
-									
-									# Remove timer
-									del sell_timers[slug]
-								else:
-									print(f"❌ Failed to record sell for {slug}")
-									print(f"{'═'*70}\n")
-									del sell_timers[slug]
+								# Remove timer
+								del sell_timers[slug]
+								last_drawn.pop(slug, None)
 							else:
-								print(f"❌ Failed to fetch orderbook for selling")
-								print(f"{'═'*70}\n")
+								sys.stdout.write(f"❌ Failed to record sell for {slug}\n{SEP_HEAVY}\n\n")
 								del sell_timers[slug]
+								last_drawn.pop(slug, None)
+						else:
+							sys.stdout.write(f"❌ Failed to fetch orderbook for selling\n{SEP_HEAVY}\n\n")
+							del sell_timers[slug]
+							last_drawn.pop(slug, None)
 			
-			# Small sleep to avoid busy-waiting
-			time.sleep(0.2)
+			# Write any ledger mutations from this iteration to disk
+			flush_balance()
+
+			# Sleep until the next ping or the next timer deadline (1s cap
+			# keeps the countdown display ticking)
+			timeout = 1.0
+			if sell_timers:
+				now = time.monotonic()
+				for start in sell_timers.values():
+					remaining = sell_timeout - (now - start)
+					timeout = min(timeout, max(remaining, 0.05))
+			if PING_EVENT.wait(timeout=timeout):
+				PING_EVENT.clear()
 			
 	except KeyboardInterrupt:
-		print("\n\n" + "="*70)
-		print("🛑 SNIPERX STOPPED")
-		print("="*70)
-		print("👋 Goodbye!\n")
+		sys.stdout.write(
+			f"\n\n{SEP_EQ}\n"
+			"🛑 SNIPERX STOPPED\n"
+			f"{SEP_EQ}\n"
+			"👋 Goodbye!\n\n"
+		)
 
 if __name__ == "__main__":
 	main()
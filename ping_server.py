@@ -4,18 +4,36 @@ Simple ping server to receive text payloads from Android app
 """
 
 from flask import Flask, request, jsonify
+from collections import deque
 import datetime
 import threading
 import time
 
-# Global storage for ping data
+# Per-request console output; turn off under heavy ping load, where the
+# stdout writes become a measurable per-request cost
+VERBOSE = True
+
+# Global storage for ping data. The deque drops the oldest payloads itself,
+# so there is no per-request truncation copy. Timestamps are stored as raw
+# time.time_ns() integers and only rendered to ISO strings on read.
 ping_data = {
-    'last_ping': None,
+    'last_ping_ns': None,
     'count': 0,
-    'payloads': [],
+    'payloads': deque(maxlen=50),
     'last_text': None
 }
 
+
+def _iso(ns):
+    """Render a time.time_ns() value as an ISO timestamp string"""
+    return datetime.datetime.fromtimestamp(ns / 1e9).isoformat()
+
+# Flask serves requests from multiple threads; guard ping_data mutations
+_lock = threading.Lock()
+
+# Set whenever a ping arrives so the main loop can sleep instead of polling
+PING_EVENT = threading.Event()
+
 app = Flask(__name__)
 
 @app.route('/ping', methods=['GET', 'POST'])
@@ -33,44 +51,55 @@ def ping():
         received_text = request.args.get('text')
     
     # Display incoming ping
-    print(f"\n{'─'*70}")
-    print(f"📱 PING RECEIVED from {request.remote_addr}")
-    if received_text:
-        ping_data['last_text'] = received_text
-        print(f"📝 Message: '{received_text}'")
-    else:
+    if VERBOSE:
+        print(f"\n{'─'*70}")
+        print(f"📱 PING RECEIVED from {request.remote_addr}")
+        print(f"📝 Message: '{received_text}'" if received_text else "📝 Message: (none)")
+        print(f"{'─'*70}\n")
+
+    if not received_text:
         received_text = "No text provided"
-        print(f"📝 Message: (none)")
-    print(f"{'─'*70}\n")
-    
-    # Update ping data
-    ping_data['last_ping'] = datetime.datetime.now()
-    ping_data['count'] += 1
-    ping_data['payloads'].append({
-        'timestamp': ping_data['last_ping'].isoformat(),
-        'text': received_text
-    })
-    
-    # Keep only last 50 payloads to avoid memory issues
-    if len(ping_data['payloads']) > 50:
-        ping_data['payloads'] = ping_data['payloads'][-50:]
-    
+
+    # Update ping data (one clock read, no datetime construction)
+    now_ns = time.time_ns()
+    with _lock:
+        if received_text != "No text provided":
+            ping_data['last_text'] = received_text
+        ping_data['last_ping_ns'] = now_ns
+        ping_data['count'] += 1
+        ping_data['payloads'].append({
+            'timestamp_ns': now_ns,
+            'text': received_text
+        })
+        count = ping_data['count']
+
+    # Wake up the main loop
+    PING_EVENT.set()
+
     # Return response to Android app
     return jsonify({
         'status': 'success',
-        'timestamp': ping_data['last_ping'].isoformat(),
-        'count': ping_data['count'],
+        'timestamp': _iso(now_ns),
+        'count': count,
         'message': f'Received: {received_text}'
     })
 
 @app.route('/status')
 def status():
     """Check ping status and recent payloads"""
+    with _lock:
+        last_ping_ns = ping_data['last_ping_ns']
+        count = ping_data['count']
+        last_text = ping_data['last_text']
+        recent = list(ping_data['payloads'])[-10:]  # Last 10 payloads
     return jsonify({
-        'last_ping': ping_data['last_ping'].isoformat() if ping_data['last_ping'] else None,
-        'count': ping_data['count'],
-        'last_text': ping_data['last_text'],
-        'recent_payloads': ping_data['payloads'][-10:]  # Last 10 payloads
+        'last_ping': _iso(last_ping_ns) if last_ping_ns else None,
+        'count': count,
+        'last_text': last_text,
+        'recent_payloads': [
+            {'timestamp': _iso(p['timestamp_ns']), 'text': p['text']}
+            for p in recent
+        ]
     })
 
 @app.route('/')
@@ -88,8 +117,15 @@ def start_ping_server():
     import logging
     log = logging.getLogger('werkzeug')
     log.setLevel(logging.ERROR)  # Suppress Flask's request logging
-    
-    app.run(host='0.0.0.0', port=5000, debug=False)
+
+    # Prefer a production WSGI server - the Flask dev server handles one
+    # request at a time and caps throughput during ping bursts
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+    else:
+        serve(app, host='0.0.0.0', port=5000, threads=8)
 
 if __name__ == '__main__':
     start_ping_server()
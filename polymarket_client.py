@@ -1,8 +1,30 @@
+import functools
 import requests
 import json
 import os
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson parses the nested orderbook payloads several times faster than the
+# stdlib json module; fall back silently when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Shared session so repeated fetches reuse keep-alive connections instead of
+# paying a TCP+TLS handshake per call
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
 
 
 def fetch_orderbook(token_id: str) -> Optional[Dict[str, Any]]:
@@ -19,18 +41,51 @@ def fetch_orderbook(token_id: str) -> Optional[Dict[str, Any]]:
     params = {'token_id': token_id}
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = SESSION.get(url, params=params, timeout=10)
         response.raise_for_status()
-        
-        data = response.json()
-        return data
-        
+
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+
     except requests.exceptions.RequestException:
         return None
-    except json.JSONDecodeError:
+    except ValueError:  # covers both orjson and stdlib JSONDecodeError
         return None
 
 
+# Last fetch per token: {token_id: (monotonic timestamp, data)}. Bounded by
+# the number of configured tokens, so memory is trivial. The lock keeps
+# concurrent fetch-pool workers from racing on lookups/stores.
+_OB_CACHE = {}
+_OB_CACHE_LOCK = threading.Lock()
+
+
+def fetch_orderbook_cached(token_id: str, ttl: float = 0.5) -> Optional[Dict[str, Any]]:
+    """
+    Fetch an orderbook, reusing a result fetched within the last `ttl` seconds.
+
+    Collapses duplicate fetches when a buy and an expiring sell timer hit the
+    same token in one main-loop tick.
+    """
+    now = time.monotonic()
+    with _OB_CACHE_LOCK:
+        fetched_at, data = _OB_CACHE.get(token_id, (0.0, None))
+    if data is not None and now - fetched_at < ttl:
+        return data
+    data = fetch_orderbook(token_id)
+    with _OB_CACHE_LOCK:
+        _OB_CACHE[token_id] = (now, data)
+    return data
+
+
+@functools.lru_cache(maxsize=1)
+def _ensure_snapshot_dir(base_dir: str = 'snapshots') -> str:
+    """Create the snapshots directory once per process and return its path"""
+    os.makedirs(base_dir, exist_ok=True)
+    return base_dir
+
+
 def save_orderbook_snapshot(orderbook_data: Dict[str, Any], token_id: str, min_value: float = 20.0, slug: Optional[str] = None, investment: float = 0.0, trade_type: str = "BUY") -> tuple[str, Optional[Dict[str, float]]]:
     """
     Save orderbook data to a readable text file with timestamp, filtering out orders with value < min_value
@@ -47,18 +102,13 @@ def save_orderbook_snapshot(orderbook_data: Dict[str, Any], token_id: str, min_v
         str: The filename where the snapshot was saved
     """
     # Simple directory structure: just snapshots/
-    base_dir = 'snapshots'
-    os.makedirs(base_dir, exist_ok=True)
-    
-    # Human-readable timestamp format: oct19_12_45_21 (month-day_hour_minutes_seconds)
+    base_dir = _ensure_snapshot_dir()
+
+    # One clock read formats both the filename and the header timestamp.
+    # Filename format: oct19_12_45_21 (month-day_hour_minutes_seconds)
     now = datetime.now()
-    month_abbr = now.strftime("%b").lower()  # oct, nov, dec, etc.
-    day = now.strftime("%d")  # 19, 20, etc.
-    hour = now.strftime("%H")  # 12, 22, etc.
-    minute = now.strftime("%M")  # 45, 42, etc.
-    second = now.strftime("%S")  # 21, 34, etc.
-    
-    timestamp_str = f"{month_abbr}{day}_{hour}_{minute}_{second}"
+    timestamp_str = f"{now:%b%d_%H_%M_%S}".lower()
+    timestamp_iso = now.isoformat()
     slug_or_prefix = (slug or (token_id[:10]))
     trade_label = trade_type.upper()
     
@@ -67,22 +117,18 @@ def save_orderbook_snapshot(orderbook_data: Dict[str, Any], token_id: str, min_v
         f"{trade_label}_{slug_or_prefix}_{timestamp_str}.txt"
     )
     
-    # Filter bids and asks based on minimum value
+    # Parse levels once into (price, size, value) tuples - tuples sort on
+    # price natively, so no key lambda is needed and nothing is re-cast later
     filtered_bids = []
     filtered_asks = []
-    
+
     # Filter bids (include all, no filtering)
     if 'bids' in orderbook_data:
         for bid in orderbook_data['bids']:
             price = float(bid['price'])
             size = float(bid['size'])
-            value = price * size
-            filtered_bids.append({
-                'price': price,
-                'size': size,
-                'total_value': round(value, 2)
-            })
-    
+            filtered_bids.append((price, size, round(price * size, 2)))
+
     # Filter asks (include all, NO FILTERING)
     if 'asks' in orderbook_data:
         for ask in orderbook_data['asks']:
@@ -90,36 +136,31 @@ def save_orderbook_snapshot(orderbook_data: Dict[str, Any], token_id: str, min_v
                 price = float(ask.get('price', 0))
                 size = float(ask.get('size', 0))
                 if price > 0 and size > 0:
-                    value = price * size
-                    filtered_asks.append({
-                        'price': price,
-                        'size': size,
-                        'total_value': round(value, 2)
-                    })
+                    filtered_asks.append((price, size, round(price * size, 2)))
             except (ValueError, TypeError, AttributeError):
                 continue
-    
+
     print(f"DEBUG: Total bids: {len(filtered_bids)}, Total asks: {len(filtered_asks)}")
     if filtered_asks:
-        ask_prices = [a['price'] for a in filtered_asks]
+        ask_prices = [a[0] for a in filtered_asks]
         print(f"DEBUG: Ask prices range: {min(ask_prices):.3f} to {max(ask_prices):.3f}")
-    
+
     # Sort: bids high->low (best bids are highest), asks low->high (best asks are lowest)
-    filtered_bids.sort(key=lambda x: x['price'], reverse=True)
-    filtered_asks.sort(key=lambda x: x['price'])  # LOW to HIGH for asks
+    filtered_bids.sort(reverse=True)
+    filtered_asks.sort()  # LOW to HIGH for asks
 
     # Prepare simple table formatting
     def format_table(rows, title):
         if not rows:
             return f"No {title.lower()} found"
-        
+
         lines = []
-        for row in rows:
-            price_str = f"{row['price']:.3f}".ljust(10)
-            size_str = f"{row['size']:.2f}".ljust(10)
-            value_str = f"{row['total_value']:.2f}".ljust(10)
+        for price, size, value in rows:
+            price_str = f"{price:.3f}".ljust(10)
+            size_str = f"{size:.2f}".ljust(10)
+            value_str = f"{value:.2f}".ljust(10)
             lines.append(f"{price_str} | {size_str} | {value_str}              |     {title}")
-        
+
         return "\n".join(lines)
 
     # Top 5: best bids (highest prices) and best asks (lowest prices)
@@ -133,31 +174,28 @@ def save_orderbook_snapshot(orderbook_data: Dict[str, Any], token_id: str, min_v
     if trade_type == "SELL":
         # For SELL snapshots, show best bid prices available
         if filtered_bids:
-            trade_line = f"Market snapshot for SELL - Best bid: ${filtered_bids[0]['price']:.3f}"
+            trade_line = f"Market snapshot for SELL - Best bid: ${filtered_bids[0][0]:.3f}"
         else:
             trade_line = "Market snapshot for SELL - No bids available"
     elif filtered_asks and investment > 0:
-        # BUY: Sort asks by price (low to high) to fill from best prices first
-        sorted_asks = sorted(filtered_asks, key=lambda x: x['price'])
-        
+        # BUY: filtered_asks is already parsed to floats and sorted low->high,
+        # so fill from the front tracking cumulative spend - no re-sort and no
+        # per-level float() casts
         remaining_investment = investment
         total_shares = 0.0
         total_spent = 0.0
         fills = []
-        
+
         # Fill orders from lowest ask price upward until investment is exhausted
-        for ask in sorted_asks:
+        for price, available_size, _ in filtered_asks:
             if remaining_investment <= 0:
                 break
-            
-            price = float(ask['price'])
-            available_size = float(ask['size'])
-            
+
             # How many shares can we buy at this price level?
             max_shares_at_price = remaining_investment / price
             shares_to_buy = min(available_size, max_shares_at_price)
             cost = shares_to_buy * price
-            
+
             if shares_to_buy > 0:
                 fills.append({'price': price, 'shares': shares_to_buy, 'cost': cost})
                 total_shares += shares_to_buy
@@ -189,54 +227,53 @@ def save_orderbook_snapshot(orderbook_data: Dict[str, Any], token_id: str, min_v
     else:
         trade_line = "Trade plan: no asks available or no investment"
 
-    # Write readable text file
+    # Best prices and spread, computed once for header, mid-line and summary
+    best_bid_price = filtered_bids[0][0] if filtered_bids else None
+    best_ask_price = filtered_asks[0][0] if filtered_asks else None
+    spread = (best_ask_price - best_bid_price) if (filtered_bids and filtered_asks) else None
+
+    # Assemble the whole file in memory and write it with one call
+    sep = "=" * 60 + "\n"
+    parts = [
+        sep,
+        "POLYMARKET ORDERBOOK SNAPSHOT\n",
+        sep,
+        f"Timestamp: {timestamp_iso}\n",
+        f"Token ID: {token_id}\n",
+    ]
+    if slug:
+        parts.append(f"Slug: {slug}\n")
+    # Put spread at the top
+    if spread is not None:
+        parts.append(f"Spread: ${spread:.4f}\n")
+    parts.append(trade_line + "\n")
+    parts.append(sep + "\n")
+
+    # Asks section (display high->low, so reverse the list)
+    display_asks = list(reversed(top_asks))
+    parts.append(format_table(display_asks, "ASKS") + "\n")
+
+    # Spread line between asks and bids
+    if spread is not None:
+        parts.append("---------------------------------------------     spread {:.4f}\n".format(spread))
+    else:
+        parts.append("---------------------------------------------\n")
+
+    # Bids section (already sorted high->low)
+    parts.append(format_table(top_bids, "BIDS") + "\n\n")
+
+    # Summary
+    parts.append("SUMMARY\n")
+    parts.append("-" * 30 + "\n")
+    parts.append(f"Total Bids (>= ${min_value}): {len(filtered_bids)}\n")
+    parts.append(f"Total Asks (>= ${min_value}): {len(filtered_asks)}\n")
+    if spread is not None:
+        parts.append(f"Best Bid: ${best_bid_price:.3f}\n")
+        parts.append(f"Best Ask: ${best_ask_price:.3f}\n")
+        parts.append(f"Spread: ${spread:.4f}\n")
+    parts.append("\n" + sep)
+
     with open(filename, 'w') as f:
-        f.write("=" * 60 + "\n")
-        f.write(f"POLYMARKET ORDERBOOK SNAPSHOT\n")
-        f.write("=" * 60 + "\n")
-        f.write(f"Timestamp: {datetime.now().isoformat()}\n")
-        f.write(f"Token ID: {token_id}\n")
-        if slug:
-            f.write(f"Slug: {slug}\n")
-        # Put spread at the top
-        if filtered_bids and filtered_asks:
-            top_bid_price = filtered_bids[0]['price']
-            top_ask_price = filtered_asks[0]['price']
-            spread_top = top_ask_price - top_bid_price
-            f.write(f"Spread: ${spread_top:.4f}\n")
-        f.write(trade_line + "\n")
-        f.write("=" * 60 + "\n\n")
-        
-        # Write asks section (display high->low, so reverse the list)
-        display_asks = list(reversed(top_asks))
-        f.write(format_table(display_asks, "ASKS") + "\n")
-        
-        # Add spread line between asks and bids
-        if top_asks and top_bids:
-            best_ask_price = top_asks[0]['price']  # lowest ask (first in sorted list)
-            best_bid_price = top_bids[0]['price']  # highest bid (first in sorted list)
-            spread = best_ask_price - best_bid_price
-            f.write("---------------------------------------------     spread {:.4f}\n".format(spread))
-        else:
-            f.write("---------------------------------------------\n")
-        
-        # Write bids section (already sorted high->low)
-        f.write(format_table(top_bids, "BIDS") + "\n\n")
-        
-        # Write summary
-        f.write("SUMMARY\n")
-        f.write("-" * 30 + "\n")
-        f.write(f"Total Bids (>= ${min_value}): {len(filtered_bids)}\n")
-        f.write(f"Total Asks (>= ${min_value}): {len(filtered_asks)}\n")
-        
-        if top_bids and top_asks:
-            best_bid_price = top_bids[0]['price']
-            best_ask_price = top_asks[0]['price']
-            spread = best_ask_price - best_bid_price
-            f.write(f"Best Bid: ${best_bid_price:.3f}\n")
-            f.write(f"Best Ask: ${best_ask_price:.3f}\n")
-            f.write(f"Spread: ${spread:.4f}\n")
-        
-        f.write("\n" + "=" * 60 + "\n")
-    
+        f.write("".join(parts))
+
     return filename, trade_info